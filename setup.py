@@ -2,6 +2,7 @@
 Setup script for sysml2pytest
 """
 
+import os
 from setuptools import setup, find_packages
 from pathlib import Path
 
@@ -9,6 +10,12 @@ from pathlib import Path
 readme_file = Path(__file__).parent / "README.md"
 long_description = readme_file.read_text() if readme_file.exists() else ""
 
+# Optionally compile the test file parser with mypyc (SYSML2PYTEST_MYPYC=1)
+ext_modules = []
+if os.environ.get("SYSML2PYTEST_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["--follow-imports=silent", "sysml2pytest/sync/parser.py"])
+
 setup(
     name="sysml2pytest",
     version="0.1.0",
@@ -18,6 +25,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/sysml2pytest",
     packages=find_packages(),
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -48,6 +56,9 @@ setup(
         "sysml": [
             "sysml-v2-api-client>=1.0.0",
         ],
+        "fast": [
+            "orjson>=3.9.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,62 @@
+"""
+Compatibility helpers for the supported Python versions, platforms and optional dependencies
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
+# Keyword arguments for @dataclass of value classes. Slotted instances are
+# smaller and faster to build; dataclass(slots=) needs Python 3.10
+DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def json_dumps(data: Any) -> bytes:
+    """Encode data as indented JSON"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode()
+
+
+def json_loads(raw: bytes) -> Any:
+    """Decode JSON data"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    Write data to path through a uniquely named temporary file in the same directory
+
+    os.replace moves the temporary file over path, so readers see either the old or
+    the new contents, and concurrent writers never share a temporary file. The
+    permission bits of an existing file are kept.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        else:
+            # mkstemp creates the file as 0600; use the mode a plain open() would
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_name, 0o666 & ~umask)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
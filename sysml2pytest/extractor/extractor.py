@@ -4,11 +4,11 @@ SysML V2 Requirement Extractor
 Extracts and parses requirement definitions from SysML V2 models
 """
 
-import json
 import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from .._compat import json_dumps, json_loads
 from .client import SysMLV2Client
 from .models import (
     Requirement,
@@ -280,8 +280,7 @@ class RequirementExtractor:
         }
 
         output_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, "w") as f:
-            json.dump(data, f, indent=2)
+        output_file.write_bytes(json_dumps(data))
 
         logger.info(f"Saved {len(requirements)} requirements to {output_file}")
 
@@ -296,8 +295,7 @@ class RequirementExtractor:
         Returns:
             List of requirements
         """
-        with open(input_file, "r") as f:
-            data = json.load(f)
+        data = json_loads(input_file.read_bytes())
 
         requirements = [
             Requirement.from_dict(req_data)
@@ -6,6 +6,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Optional, Any
 
+from .._compat import DATACLASS_SLOTS
+
 
 class ConstraintKind(str, Enum):
     """Type of constraint in a requirement"""
@@ -22,7 +24,7 @@ class AttributeType(str, Enum):
     UNKNOWN = "Unknown"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RequirementAttribute:
     """Represents an attribute within a requirement"""
     name: str
@@ -43,7 +45,7 @@ class RequirementAttribute:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Constraint:
     """Represents a constraint expression"""
     kind: ConstraintKind
@@ -60,7 +62,7 @@ class Constraint:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RequirementMetadata:
     """Metadata about a requirement"""
     id: str
@@ -87,7 +89,7 @@ class RequirementMetadata:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Requirement:
     """Complete requirement definition from SysML V2"""
     metadata: RequirementMetadata
@@ -9,12 +9,16 @@ from dataclasses import dataclass, field
 from datetime import datetime
 import re
 
-from ..extractor.models import Requirement, ConstraintKind
-from ..transpiler import ConstraintTranspiler, HypothesisStrategyGenerator
+from ..extractor.models import Constraint, Requirement, ConstraintKind
+from ..transpiler import DEFAULT_TRANSPILER, HypothesisStrategyGenerator
 from .templates import TestTemplate
 
 logger = logging.getLogger(__name__)
 
+# Patterns used by _sanitize_name
+_NON_IDENTIFIER_PATTERN = re.compile(r'[^a-zA-Z0-9_]')
+_LEADING_DIGITS_PATTERN = re.compile(r'^[0-9]+')
+
 
 @dataclass
 class GeneratorConfig:
@@ -40,7 +44,7 @@ class PytestGenerator:
             config: Generator configuration
         """
         self.config = config
-        self.transpiler = ConstraintTranspiler()
+        self.transpiler = DEFAULT_TRANSPILER
         self.strategy_generator = HypothesisStrategyGenerator()
         self.template = TestTemplate()
 
@@ -67,18 +71,31 @@ class PytestGenerator:
             output_file = self.config.output_dir / "test_generated_requirements.py"
 
         # Generate test code
+        test_code = self.render_tests(requirements)
+
+        # Write to file
+        self._write_test_file(output_file, test_code)
+
+        logger.info(f"Generated tests for {len(requirements)} requirements in {output_file}")
+        return output_file
+
+    def render_tests(self, requirements: List[Requirement]) -> str:
+        """
+        Render pytest test file code from requirements without writing it
+
+        Args:
+            requirements: List of requirements to generate tests for
+
+        Returns:
+            Test file code, formatted if config.format_code is set
+        """
         test_code = self._generate_test_file(requirements)
 
         # Optionally format code
         if self.config.format_code:
             test_code = self._format_code(test_code)
 
-        # Write to file
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(test_code)
-
-        logger.info(f"Generated tests for {len(requirements)} requirements in {output_file}")
-        return output_file
+        return test_code
 
     def generate_tests_per_requirement(
         self,
@@ -99,19 +116,21 @@ class PytestGenerator:
             filename = f"test_{self._sanitize_name(requirement.metadata.name)}.py"
             output_file = self.config.output_dir / filename
 
-            test_code = self._generate_test_file([requirement])
+            test_code = self.render_tests([requirement])
 
-            if self.config.format_code:
-                test_code = self._format_code(test_code)
-
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            output_file.write_text(test_code)
+            self._write_test_file(output_file, test_code)
 
             generated_files[requirement.metadata.id] = output_file
 
         logger.info(f"Generated {len(generated_files)} test files")
         return generated_files
 
+    def _write_test_file(self, output_file: Path, test_code: str) -> None:
+        """Write generated test code as UTF-8 with LF line endings"""
+        # One encode and one write; the sync parser reads these files as UTF-8 bytes
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_bytes(test_code.encode("utf-8"))
+
     def _generate_test_file(self, requirements: List[Requirement]) -> str:
         """Generate complete test file code"""
         # Header
@@ -155,11 +174,15 @@ class PytestGenerator:
 
     def _generate_property_test(self, requirement: Requirement) -> str:
         """Generate property-based test using Hypothesis"""
+        # The constraint properties filter on every access, so partition once
+        assume_constraint_list = requirement.assume_constraints
+        require_constraint_list = requirement.require_constraints
+
         # Generate strategies for each attribute
         strategies = {}
         for attr in requirement.attributes:
             # Try to extract constraint ranges for this attribute
-            ranges = self._extract_ranges_for_attribute(attr.name, requirement)
+            ranges = self._extract_ranges_for_attribute(attr.name, require_constraint_list)
             strategy_config = self.strategy_generator.generate_strategy(attr, ranges)
             strategies[attr.name] = strategy_config.strategy_code
 
@@ -169,7 +192,7 @@ class PytestGenerator:
         # Transpile assume constraints
         assume_constraints = []
         assume_code = []
-        for constraint in requirement.assume_constraints:
+        for constraint in assume_constraint_list:
             assume_constraints.append(constraint.expression)
             transpiled = self.transpiler.transpile(constraint.expression)
             assume_code.append(f"assume({transpiled.python_code})")
@@ -177,7 +200,7 @@ class PytestGenerator:
         # Transpile require constraints
         require_constraints = []
         require_code = []
-        for constraint in requirement.require_constraints:
+        for constraint in require_constraint_list:
             require_constraints.append(constraint.expression)
             transpiled = self.transpiler.transpile(constraint.expression)
             require_code.append(f"assert {transpiled.python_code}")
@@ -262,14 +285,14 @@ class Test{class_name}:
     def _extract_ranges_for_attribute(
         self,
         attr_name: str,
-        requirement: Requirement
+        require_constraints: List[Constraint]
     ) -> Optional[Dict[str, Any]]:
         """
         Extract min/max ranges for an attribute from constraints
 
         Args:
             attr_name: Attribute name
-            requirement: Requirement containing constraints
+            require_constraints: Require constraints of the requirement
 
         Returns:
             Dict with 'min' and/or 'max' keys if found
@@ -277,7 +300,7 @@ class Test{class_name}:
         ranges = {}
 
         # Check all require constraints for this attribute
-        for constraint in requirement.require_constraints:
+        for constraint in require_constraints:
             if attr_name in constraint.expression:
                 extracted = self.strategy_generator.extract_constraint_ranges(
                     constraint.expression
@@ -298,10 +321,10 @@ class Test{class_name}:
             Sanitized name
         """
         # Remove non-alphanumeric characters
-        sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+        sanitized = _NON_IDENTIFIER_PATTERN.sub('_', name)
 
         # Remove leading digits
-        sanitized = re.sub(r'^[0-9]+', '', sanitized)
+        sanitized = _LEADING_DIGITS_PATTERN.sub('', sanitized)
 
         # Convert to snake_case or PascalCase
         if capitalize:
@@ -2,8 +2,15 @@
 Templates for generating pytest test files
 """
 
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
 from jinja2 import Template
 
+# Placeholder for the i-th value in a rendered template skeleton
+_HOLE = "\x00{}\x00"
+_HOLE_RE = re.compile("\x00(\\d+)\x00")
+
 
 class TestTemplate:
     """Templates for generating pytest tests"""
@@ -81,6 +88,9 @@ from hypothesis import given, assume, strategies as st
     # SYSML2PYTEST-GENERATED-END
 """)
 
+    # Rendered PROPERTY_TEST skeletons, keyed by the lengths of the list arguments
+    _property_skeletons: Dict[Tuple[int, ...], str] = {}
+
     # Template for parametrized test
     PARAMETRIZED_TEST = Template("""
 @pytest.mark.requirement(id="{{ requirement_id }}", name="{{ requirement_name }}")
@@ -172,20 +182,66 @@ class Test{{ class_name }}:
         if not generated_at:
             generated_at = datetime.now().isoformat()
 
-        return TestTemplate.PROPERTY_TEST.render(
-            requirement_id=requirement_id,
-            requirement_name=requirement_name,
-            test_function_name=test_function_name,
-            documentation=documentation,
-            strategies=strategies,
-            param_list=param_list,
-            assume_constraints=assume_constraints,
-            require_constraints=require_constraints,
-            assume_constraint_code=assume_constraint_code,
-            require_constraint_code=require_constraint_code,
-            system_call=system_call,
-            content_hash=content_hash,
-            version=version,
-            generated_at=generated_at,
-            generator_version=generator_version
+        # The template only branches on list lengths, so tests of the same shape
+        # share one rendered skeleton and just differ in the values filled in
+        values = [
+            str(value) for value in (
+                requirement_id, requirement_name, test_function_name, documentation,
+                param_list, system_call, content_hash, version, generated_at,
+                generator_version, *strategies, *strategies.values(), *assume_constraints,
+                *require_constraints, *assume_constraint_code, *require_constraint_code
+            )
+        ]
+        shape = (
+            len(strategies), len(assume_constraints), len(require_constraints),
+            len(assume_constraint_code), len(require_constraint_code)
+        )
+
+        if any("\x00" in value for value in values):
+            return TestTemplate.PROPERTY_TEST.render(
+                **TestTemplate._property_test_context(values, shape)
+            )
+
+        skeleton = TestTemplate._property_skeletons.get(shape)
+        if skeleton is None:
+            holes = [_HOLE.format(i) for i in range(len(values))]
+            skeleton = TestTemplate.PROPERTY_TEST.render(
+                **TestTemplate._property_test_context(holes, shape)
+            )
+            TestTemplate._property_skeletons[shape] = skeleton
+
+        return _HOLE_RE.sub(lambda match: values[int(match.group(1))], skeleton)
+
+    @staticmethod
+    def _property_test_context(
+        values: Sequence[str],
+        shape: Tuple[int, ...]
+    ) -> Dict[str, Any]:
+        """Rebuild PROPERTY_TEST arguments from render_property_test's flat value list"""
+        strategy_count, *list_lengths = shape
+        param_names = values[10:10 + strategy_count]
+        strategy_codes = values[10 + strategy_count:10 + 2 * strategy_count]
+
+        lists: List[List[str]] = []
+        offset = 10 + 2 * strategy_count
+        for length in list_lengths:
+            lists.append(list(values[offset:offset + length]))
+            offset += length
+
+        return dict(
+            requirement_id=values[0],
+            requirement_name=values[1],
+            test_function_name=values[2],
+            documentation=values[3],
+            param_list=values[4],
+            system_call=values[5],
+            content_hash=values[6],
+            version=values[7],
+            generated_at=values[8],
+            generator_version=values[9],
+            strategies=dict(zip(param_names, strategy_codes)),
+            assume_constraints=lists[0],
+            require_constraints=lists[1],
+            assume_constraint_code=lists[2],
+            require_constraint_code=lists[3]
         )
@@ -4,7 +4,9 @@ Sync module for keeping requirements and tests synchronized
 
 from .fingerprint import RequirementFingerprint, compute_requirement_hash
 from .detector import SyncDetector, SyncReport, RequirementChange, ChangeType
-from .state import SyncState, SyncStateManager, RequirementState, TestFileState
+from .state import (
+    SyncState, SyncStateManager, RequirementState, TestFileState, UnsupportedStateVersionError
+)
 from .parser import TestFileParser, ParsedTest, TestMetadata, ProtectedRegion
 from .updater import TestUpdater, UpdateStrategy, UpdateResult
 
@@ -19,6 +21,7 @@ __all__ = [
     "SyncStateManager",
     "RequirementState",
     "TestFileState",
+    "UnsupportedStateVersionError",
     "TestFileParser",
     "ParsedTest",
     "TestMetadata",
@@ -6,12 +6,81 @@ Parses existing pytest test files to extract metadata and protected regions
 
 import re
 import logging
+from collections import OrderedDict
+from functools import cached_property
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from typing import Any, ClassVar, List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Matches the test function definition that follows a metadata block
+_FUNC_PATTERN = re.compile(r'def\s+(test_\w+)\s*\(')
+
+# Matches a "# key: value" metadata comment line
+_META_PATTERN = re.compile(r'#\s*(\w+)\s*:\s*(.*)')
+
+# Region markers written by the generator templates
+MARKER_PREFIX = "# SYSML2PYTEST-"
+METADATA_START = "# SYSML2PYTEST-METADATA-START"
+METADATA_END = "# SYSML2PYTEST-METADATA-END"
+GENERATED_START = "# SYSML2PYTEST-GENERATED-START"
+GENERATED_END = "# SYSML2PYTEST-GENERATED-END"
+CUSTOM_START = "# SYSML2PYTEST-CUSTOM-START"
+CUSTOM_END = "# SYSML2PYTEST-CUSTOM-END"
+
+_MARKER_PREFIX_BYTES = MARKER_PREFIX.encode()
+
+# Marker line -> (region type, is start marker)
+_MARKER_DISPATCH = {
+    METADATA_START: ("METADATA", True),
+    METADATA_END: ("METADATA", False),
+    GENERATED_START: ("GENERATED", True),
+    GENERATED_END: ("GENERATED", False),
+    CUSTOM_START: ("CUSTOM", True),
+    CUSTOM_END: ("CUSTOM", False),
+}
+
+# Marker kinds of one test as rendered by the generator's property test template
+_CANONICAL_LAYOUT = (
+    ("METADATA", True), ("METADATA", False),
+    ("GENERATED", True), ("GENERATED", False),
+    ("CUSTOM", True), ("CUSTOM", False),
+    ("GENERATED", True), ("GENERATED", False),
+)
+
+# (kind, line index, line start offset, next line start offset)
+_Marker = Tuple[Any, int, int, int]
+
+
+def _decode_lines(buf: bytes, start: int, end: int, keepends: bool = False) -> List[str]:
+    """Decode buf[start:end] into lines (right-stripped unless keepends)"""
+    text = buf[start:end].decode()
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+
+    lines = text.split("\n")
+    tail = lines.pop()  # Text after the final newline
+
+    if keepends:
+        lines = [line + "\n" for line in lines]
+        if tail:
+            lines.append(tail)
+    else:
+        lines = [line.rstrip() for line in lines]
+        if tail:
+            lines.append(tail.rstrip())
+
+    return lines
+
+
+def _count_lines(buf: bytes, start: int, end: int) -> int:
+    """Number of lines _decode_lines returns for buf[start:end], without decoding"""
+    count = buf.count(b"\n", start, end)
+    if end > start and buf[end - 1] != 0x0A:  # Text after the final newline
+        count += 1
+    return count
+
 
 @dataclass
 class TestMetadata:
@@ -26,30 +95,42 @@ class TestMetadata:
     @classmethod
     def from_comment_block(cls, lines: List[str]) -> Optional["TestMetadata"]:
         """Parse metadata from comment block"""
-        metadata = {}
+        requirement_id = None
+        requirement_name = ""
+        content_hash = ""
+        version = "1"
+        generated_at = ""
+        generator_version = ""
 
         for line in lines:
-            line = line.strip()
-            if not line.startswith("#"):
+            match = _META_PATTERN.match(line.strip())
+            if not match:
                 continue
 
-            # Parse key: value format
-            if ":" in line:
-                key_value = line[1:].strip()  # Remove #
-                if ":" in key_value:
-                    key, value = key_value.split(":", 1)
-                    metadata[key.strip()] = value.strip()
-
-        if "requirement_id" not in metadata:
+            key, value = match.groups()
+            if key == "requirement_id":
+                requirement_id = value
+            elif key == "requirement_name":
+                requirement_name = value
+            elif key == "content_hash":
+                content_hash = value
+            elif key == "version":
+                version = value
+            elif key == "generated_at":
+                generated_at = value
+            elif key == "generator_version":
+                generator_version = value
+
+        if requirement_id is None:
             return None
 
         return cls(
-            requirement_id=metadata.get("requirement_id", ""),
-            requirement_name=metadata.get("requirement_name", ""),
-            content_hash=metadata.get("content_hash", ""),
-            version=int(metadata.get("version", 1)),
-            generated_at=metadata.get("generated_at", ""),
-            generator_version=metadata.get("generator_version", ""),
+            requirement_id=requirement_id,
+            requirement_name=requirement_name,
+            content_hash=content_hash,
+            version=int(version),
+            generated_at=generated_at,
+            generator_version=generator_version,
         )
 
 
@@ -59,7 +140,14 @@ class ProtectedRegion:
     region_type: str  # "GENERATED" or "CUSTOM"
     start_line: int
     end_line: int
-    content: List[str] = field(default_factory=list)
+    # File bytes and the (start, end) byte range of the region body
+    source: bytes = field(default=b"", repr=False, compare=False)
+    span: Tuple[int, int] = (0, 0)
+
+    @cached_property
+    def content(self) -> List[str]:
+        """Region lines, decoded on first access"""
+        return _decode_lines(self.source, *self.span)
 
     def get_content_str(self) -> str:
         """Get content as string"""
@@ -75,10 +163,20 @@ class ParsedTest:
     end_line: int
     generated_regions: List[ProtectedRegion] = field(default_factory=list)
     custom_regions: List[ProtectedRegion] = field(default_factory=list)
-    full_content: List[str] = field(default_factory=list)
-
-    def has_custom_code(self) -> bool:
-        """Check if test has any custom code"""
+    # File bytes and the (start, end) byte range of the whole test
+    source: bytes = field(default=b"", repr=False, compare=False)
+    span: Tuple[int, int] = (0, 0)
+    # Total number of lines inside custom_regions
+    custom_line_count: int = 0
+
+    @cached_property
+    def full_content(self) -> List[str]:
+        """Test lines including line endings, decoded on first access"""
+        return _decode_lines(self.source, *self.span, keepends=True)
+
+    @cached_property
+    def _has_custom(self) -> bool:
+        """Memoized result of has_custom_code()"""
         for region in self.custom_regions:
             # Check if region has non-comment, non-empty lines
             for line in region.content:
@@ -87,6 +185,10 @@ class ParsedTest:
                     return True
         return False
 
+    def has_custom_code(self) -> bool:
+        """Check if test has any custom code"""
+        return self._has_custom
+
     def get_custom_code(self) -> List[str]:
         """Get all custom code lines"""
         custom_lines = []
@@ -99,16 +201,24 @@ class TestFileParser:
     """Parses pytest test files to extract metadata and regions"""
 
     # Markers for regions
-    METADATA_START = "# SYSML2PYTEST-METADATA-START"
-    METADATA_END = "# SYSML2PYTEST-METADATA-END"
-    GENERATED_START = "# SYSML2PYTEST-GENERATED-START"
-    GENERATED_END = "# SYSML2PYTEST-GENERATED-END"
-    CUSTOM_START = "# SYSML2PYTEST-CUSTOM-START"
-    CUSTOM_END = "# SYSML2PYTEST-CUSTOM-END"
-
-    def __init__(self):
+    MARKER_PREFIX: ClassVar[str] = MARKER_PREFIX
+    METADATA_START: ClassVar[str] = METADATA_START
+    METADATA_END: ClassVar[str] = METADATA_END
+    GENERATED_START: ClassVar[str] = GENERATED_START
+    GENERATED_END: ClassVar[str] = GENERATED_END
+    CUSTOM_START: ClassVar[str] = CUSTOM_START
+    CUSTOM_END: ClassVar[str] = CUSTOM_END
+
+    # Maximum number of parsed files kept in the parse cache
+    CACHE_SIZE: ClassVar[int] = 128
+
+    def __init__(self) -> None:
         """Initialize parser"""
-        pass
+        # path -> (file content, parsed tests), in LRU order. Entries are only
+        # reused while the file still holds the same bytes; mtime and size can
+        # stay the same across a rewrite within the filesystem's timestamp
+        # granularity
+        self._cache: "OrderedDict[str, Tuple[bytes, List[ParsedTest]]]" = OrderedDict()
 
     def parse_file(self, file_path: Path) -> List[ParsedTest]:
         """
@@ -125,92 +235,271 @@ class TestFileParser:
             return []
 
         try:
-            with open(file_path, 'r') as f:
-                lines = f.readlines()
+            key = str(file_path)
+            buf = file_path.read_bytes()
 
-            tests = self._parse_tests(lines)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == buf:
+                self._cache.move_to_end(key)
+                return list(cached[1])
+
+            # Parsed tests keep slices of this snapshot and decode them lazily
+            tests = self._parse_tests(buf)
             logger.info(f"Parsed {len(tests)} tests from {file_path}")
-            return tests
+
+            self._remember(key, buf, tests)
+            return list(tests)
 
         except Exception as e:
             logger.error(f"Failed to parse {file_path}: {e}")
             return []
 
-    def _parse_tests(self, lines: List[str]) -> List[ParsedTest]:
-        """Parse all tests from file content"""
+    def parse_files(self, file_paths: List[Path]) -> Dict[Path, List[ParsedTest]]:
+        """
+        Parse several test files
+
+        Files are parsed serially: a worker process pool costs more to start
+        and to ship the parsed tests back than parsing takes, even for files
+        of several MiB.
+
+        Args:
+            file_paths: Paths to test files
+
+        Returns:
+            Dict mapping each path to its list of ParsedTest objects
+        """
+        return {file_path: self.parse_file(file_path) for file_path in file_paths}
+
+    def invalidate(self, file_path: Path) -> None:
+        """Drop the cached parse result of one file, e.g. after writing it"""
+        self._cache.pop(str(file_path), None)
+
+    def clear_cache(self) -> None:
+        """Drop all cached parse results"""
+        self._cache.clear()
+
+    def _remember(self, key: str, buf: bytes, tests: List[ParsedTest]) -> None:
+        """Store parse result in the LRU cache"""
+        self._cache[key] = (buf, tests)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _parse_tests(self, buf: bytes) -> List[ParsedTest]:
+        """Parse all tests from raw file content"""
+        if not buf:
+            return []
+
+        markers, eof = self._index_markers(buf)
         tests = []
-        i = 0
+        pos = 0
 
-        while i < len(lines):
+        while pos < len(markers):
             # Look for metadata start
-            if lines[i].strip() == self.METADATA_START:
-                test = self._parse_single_test(lines, i)
+            if markers[pos][0] == ("METADATA", True):
+                if self._is_canonical(markers, pos):
+                    test = self._parse_canonical_test(buf, markers, eof, pos)
+                else:
+                    test = self._parse_single_test(buf, markers, eof, pos)
                 if test:
                     tests.append(test)
-                    i = test.end_line + 1
-                else:
-                    i += 1
-            else:
-                i += 1
+                    # Skip markers that belong to the parsed test
+                    while pos < len(markers) and markers[pos][1] <= test.end_line:
+                        pos += 1
+                    continue
+            pos += 1
 
         return tests
 
-    def _parse_single_test(self, lines: List[str], start_idx: int) -> Optional[ParsedTest]:
+    def _index_markers(self, buf: bytes) -> Tuple[List[_Marker], _Marker]:
+        """
+        Locate every marker line with a byte-level search
+
+        Only lines containing the marker prefix are decoded; all other lines
+        are skipped by the C-level substring search.
+
+        Returns:
+            Tuple of (markers, end-of-file sentinel). Each marker is
+            (kind, line index, line start offset, next line start offset).
+        """
+        dispatch = _MARKER_DISPATCH
+        prefix = _MARKER_PREFIX_BYTES
+        size = len(buf)
+        markers = []
+        line_idx = 0
+        counted = 0
+
+        pos = buf.find(prefix)
+        while pos != -1:
+            line_start = buf.rfind(b"\n", 0, pos) + 1
+            line_end = buf.find(b"\n", pos)
+            next_start = size if line_end == -1 else line_end + 1
+
+            # Only whitespace may precede a marker; reject other hits undecoded
+            if line_start != pos and buf[line_start:pos].decode().strip():
+                pos = buf.find(prefix, next_start)
+                continue
+
+            kind = dispatch.get(buf[line_start:next_start].decode().strip())
+            if kind is not None:
+                line_idx += buf.count(b"\n", counted, line_start)
+                counted = line_start
+                markers.append((kind, line_idx, line_start, next_start))
+
+            pos = buf.find(prefix, next_start)
+
+        # Sentinel describing the last line of the file
+        last_idx = line_idx + buf.count(b"\n", counted) - (1 if buf.endswith(b"\n") else 0)
+        last_start = buf.rfind(b"\n", 0, size - 1) + 1
+        eof = (None, last_idx, last_start, size)
+
+        return markers, eof
+
+    def _is_canonical(self, markers: List[_Marker], start_pos: int) -> bool:
+        """Check if the test at start_pos has exactly the generated marker layout"""
+        end_pos = start_pos + len(_CANONICAL_LAYOUT)
+        if end_pos < len(markers) and markers[end_pos][0] != ("METADATA", True):
+            return False
+        return tuple(marker[0] for marker in markers[start_pos:end_pos]) == _CANONICAL_LAYOUT
+
+    def _parse_canonical_test(
+        self,
+        buf: bytes,
+        markers: List[_Marker],
+        eof: _Marker,
+        start_pos: int
+    ) -> Optional[ParsedTest]:
+        """
+        Parse a test with the canonical generated layout
+
+        Same result as _parse_single_test, but every marker position is known
+        up front so no block or region searching is needed.
+        """
+        (
+            metadata_start, metadata_end,
+            generated_start, generated_end,
+            custom_start, custom_end,
+            generated2_start, generated2_end,
+        ) = markers[start_pos:start_pos + len(_CANONICAL_LAYOUT)]
+        start_idx = metadata_start[1]
+        try:
+            metadata = TestMetadata.from_comment_block(
+                _decode_lines(buf, metadata_start[3], metadata_end[2])
+            )
+            if not metadata:
+                logger.warning(f"Could not parse metadata at line {start_idx}")
+                return None
+
+            func_name, func_line = self._find_test_function(buf, metadata_end[2], metadata_end[1])
+            if not func_name:
+                logger.warning(f"Could not find test function for {metadata.requirement_id}")
+                return None
+
+            next_pos = start_pos + len(_CANONICAL_LAYOUT)
+            if next_pos < len(markers):
+                test_end, test_end_offset = markers[next_pos][1] - 1, markers[next_pos][2]
+            else:
+                test_end, test_end_offset = eof[1], eof[3]
+
+            return ParsedTest(
+                function_name=func_name,
+                metadata=metadata,
+                start_line=start_idx,
+                end_line=test_end,
+                generated_regions=[
+                    ProtectedRegion(
+                        region_type="GENERATED",
+                        start_line=generated_start[1],
+                        end_line=generated_end[1],
+                        source=buf,
+                        span=(generated_start[3], generated_end[2])
+                    ),
+                    ProtectedRegion(
+                        region_type="GENERATED",
+                        start_line=generated2_start[1],
+                        end_line=generated2_end[1],
+                        source=buf,
+                        span=(generated2_start[3], generated2_end[2])
+                    ),
+                ],
+                custom_regions=[
+                    ProtectedRegion(
+                        region_type="CUSTOM",
+                        start_line=custom_start[1],
+                        end_line=custom_end[1],
+                        source=buf,
+                        span=(custom_start[3], custom_end[2])
+                    ),
+                ],
+                source=buf,
+                span=(metadata_start[2], test_end_offset),
+                custom_line_count=_count_lines(buf, custom_start[3], custom_end[2])
+            )
+
+        except Exception as e:
+            logger.error(f"Error parsing test at line {start_idx}: {e}")
+            return None
+
+    def _parse_single_test(
+        self,
+        buf: bytes,
+        markers: List[_Marker],
+        eof: _Marker,
+        start_pos: int
+    ) -> Optional[ParsedTest]:
         """Parse a single test starting at metadata block"""
+        start_idx = markers[start_pos][1]
         try:
             # Parse metadata
-            metadata_lines, metadata_end = self._extract_block(
-                lines, start_idx, self.METADATA_START, self.METADATA_END
+            body_start, body_end, metadata_end, end_pos = self._find_block_end(
+                markers, eof, start_pos
+            )
+            metadata = TestMetadata.from_comment_block(
+                _decode_lines(buf, body_start, body_end)
             )
-            metadata = TestMetadata.from_comment_block(metadata_lines)
 
             if not metadata:
                 logger.warning(f"Could not parse metadata at line {start_idx}")
                 return None
 
             # Find test function name
-            func_name, func_line = self._find_test_function(lines, metadata_end)
+            metadata_end_offset = (markers[end_pos] if end_pos < len(markers) else eof)[2]
+            func_name, func_line = self._find_test_function(buf, metadata_end_offset, metadata_end)
             if not func_name:
                 logger.warning(f"Could not find test function for {metadata.requirement_id}")
                 return None
 
             # Find end of test (next metadata block or end of file)
-            test_end = self._find_test_end(lines, metadata_end)
+            test_end, test_end_offset = self._find_test_end(markers, eof, start_pos, metadata_end)
 
             # Extract all regions
             generated_regions = []
             custom_regions = []
+            custom_line_count = 0
 
             current = metadata_end
-            while current < test_end:
-                if lines[current].strip() == self.GENERATED_START:
-                    content, end = self._extract_block(
-                        lines, current, self.GENERATED_START, self.GENERATED_END
-                    )
-                    generated_regions.append(ProtectedRegion(
-                        region_type="GENERATED",
-                        start_line=current,
-                        end_line=end,
-                        content=content
-                    ))
-                    current = end + 1
-
-                elif lines[current].strip() == self.CUSTOM_START:
-                    content, end = self._extract_block(
-                        lines, current, self.CUSTOM_START, self.CUSTOM_END
-                    )
-                    custom_regions.append(ProtectedRegion(
-                        region_type="CUSTOM",
-                        start_line=current,
-                        end_line=end,
-                        content=content
-                    ))
-                    current = end + 1
+            pos = start_pos + 1
+            while pos < len(markers) and markers[pos][1] < test_end:
+                (region_type, is_start), line_idx = markers[pos][:2]
+                if line_idx < current or not is_start or region_type == "METADATA":
+                    pos += 1
+                    continue
+
+                body_start, body_end, end, end_pos = self._find_block_end(markers, eof, pos)
+                region = ProtectedRegion(
+                    region_type=region_type,
+                    start_line=line_idx,
+                    end_line=end,
+                    source=buf,
+                    span=(body_start, body_end)
+                )
+                if region_type == "GENERATED":
+                    generated_regions.append(region)
                 else:
-                    current += 1
-
-            # Get full test content
-            full_content = lines[start_idx:test_end + 1]
+                    custom_regions.append(region)
+                    custom_line_count += _count_lines(buf, body_start, body_end)
+                current = end + 1
+                pos = end_pos + 1
 
             return ParsedTest(
                 function_name=func_name,
@@ -219,52 +508,80 @@ class TestFileParser:
                 end_line=test_end,
                 generated_regions=generated_regions,
                 custom_regions=custom_regions,
-                full_content=full_content
+                source=buf,
+                span=(markers[start_pos][2], test_end_offset),
+                custom_line_count=custom_line_count
             )
 
         except Exception as e:
             logger.error(f"Error parsing test at line {start_idx}: {e}")
             return None
 
-    def _extract_block(
+    def _find_block_end(
         self,
-        lines: List[str],
-        start_idx: int,
-        start_marker: str,
-        end_marker: str
-    ) -> Tuple[List[str], int]:
-        """Extract content between markers"""
-        content = []
-        i = start_idx + 1  # Skip start marker
-
-        while i < len(lines):
-            if lines[i].strip() == end_marker:
-                return content, i
-
-            content.append(lines[i].rstrip())
-            i += 1
-
-        # End marker not found, return what we have
-        return content, len(lines) - 1
-
-    def _find_test_function(self, lines: List[str], start_idx: int) -> Tuple[Optional[str], int]:
-        """Find test function definition"""
-        func_pattern = re.compile(r'def\s+(test_\w+)\s*\(')
-
-        for i in range(start_idx, min(start_idx + 20, len(lines))):
-            match = func_pattern.search(lines[i])
+        markers: List[_Marker],
+        eof: _Marker,
+        start_pos: int
+    ) -> Tuple[int, int, int, int]:
+        """
+        Locate the end marker matching the start marker at start_pos
+
+        Returns:
+            Tuple of (body start offset, body end offset, end line index,
+            end marker position)
+        """
+        (region_type, _), _, _, body_start = markers[start_pos]
+        end_kind = (region_type, False)
+
+        for pos in range(start_pos + 1, len(markers)):
+            kind, line_idx, line_start, _ = markers[pos]
+            if kind == end_kind:
+                return body_start, line_start, line_idx, pos
+
+        # End marker not found, the block runs to end of file
+        return body_start, eof[3], eof[1], len(markers)
+
+    def _find_test_function(
+        self,
+        buf: bytes,
+        offset: int,
+        start_idx: int
+    ) -> Tuple[Optional[str], int]:
+        """Find test function definition within 20 lines of offset"""
+        size = len(buf)
+        for i in range(start_idx, start_idx + 20):
+            if offset >= size:
+                break
+            line_end = buf.find(b"\n", offset)
+            next_start = size if line_end == -1 else line_end + 1
+
+            match = _FUNC_PATTERN.search(buf[offset:next_start].decode())
             if match:
                 return match.group(1), i
 
+            offset = next_start
+
         return None, -1
 
-    def _find_test_end(self, lines: List[str], start_idx: int) -> int:
-        """Find end of test (next metadata block or end of file)"""
-        for i in range(start_idx, len(lines)):
-            if lines[i].strip() == self.METADATA_START:
-                return i - 1
+    def _find_test_end(
+        self,
+        markers: List[_Marker],
+        eof: _Marker,
+        start_pos: int,
+        from_line: int
+    ) -> Tuple[int, int]:
+        """
+        Find end of test (next metadata block or end of file)
+
+        Returns:
+            Tuple of (last line index of the test, byte offset just past it)
+        """
+        for pos in range(start_pos + 1, len(markers)):
+            kind, line_idx, line_start, _ = markers[pos]
+            if line_idx >= from_line and kind == ("METADATA", True):
+                return line_idx - 1, line_start
 
-        return len(lines) - 1
+        return eof[1], eof[3]
 
     def extract_requirement_ids(self, file_path: Path) -> List[str]:
         """Extract all requirement IDs from a test file"""
@@ -287,3 +604,4 @@ class TestFileParser:
             if test.metadata and test.metadata.requirement_id == requirement_id:
                 return test
         return None
+
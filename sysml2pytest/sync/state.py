@@ -4,70 +4,198 @@ Sync state management
 Tracks requirement versions, fingerprints, and sync history
 """
 
-import json
+import sys
+import time
 import logging
 from pathlib import Path
-from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
 
+from .._compat import DATACLASS_SLOTS, json_dumps, json_loads, write_atomic
 from .fingerprint import RequirementFingerprint
 
 logger = logging.getLogger(__name__)
 
+# Version of the serialized state layout (2: timestamps also stored as epoch ns).
+# Files without a version key were written by 0.1.0 and use version 1
+STATE_FORMAT_VERSION = 2
 
-@dataclass
+
+class UnsupportedStateVersionError(ValueError):
+    """Sync state file was written by a newer, incompatible release"""
+
+
+def datetime_to_ns(dt: datetime) -> int:
+    """Convert a datetime to integer nanoseconds since the epoch"""
+    return int(dt.replace(microsecond=0).timestamp()) * 1_000_000_000 + dt.microsecond * 1000
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    """Convert integer nanoseconds since the epoch to a local datetime"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=remainder // 1000)
+
+
+def _timestamp_ns(value: Optional[datetime], ns: Optional[int], name: str) -> int:
+    """Epoch-ns timestamp from a constructor's datetime or *_ns argument"""
+    if ns is not None:
+        return ns
+    if value is not None:
+        return datetime_to_ns(value)
+    raise TypeError(f"missing required argument: '{name}' or '{name}_ns'")
+
+
+def _read_timestamp_ns(data: Dict, key: str) -> int:
+    """Read an epoch-ns timestamp, accepting the older ISO format"""
+    ns = data.get(f"{key}_ns")
+    if ns is not None:
+        return ns
+    return datetime_to_ns(datetime.fromisoformat(data[key]))
+
+
+@dataclass(init=False, eq=False, **DATACLASS_SLOTS)
 class RequirementState:
     """State of a single requirement"""
     requirement_id: str
     content_hash: str
     version: int
     test_file: Optional[Path]
-    last_updated: datetime
+    last_updated_ns: int
     has_custom_code: bool = False
-    fingerprint: Optional[RequirementFingerprint] = None
+    # The fingerprint, or its serialized dict until the fingerprint property is read
+    _fingerprint: Any = field(default=None, init=False)
+
+    def __init__(
+        self,
+        requirement_id: str,
+        content_hash: str,
+        version: int,
+        test_file: Optional[Path],
+        last_updated: Optional[datetime] = None,
+        has_custom_code: bool = False,
+        fingerprint: Optional[RequirementFingerprint] = None,
+        *,
+        last_updated_ns: Optional[int] = None
+    ):
+        self.requirement_id = requirement_id
+        self.content_hash = content_hash
+        self.version = version
+        self.test_file = test_file
+        self.last_updated_ns = _timestamp_ns(last_updated, last_updated_ns, "last_updated")
+        self.has_custom_code = has_custom_code
+        self._fingerprint = fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        # Compares built fingerprints, so a loaded state equals the state it was saved from
+        return self._astuple() == other._astuple()
+
+    def _astuple(self) -> tuple:
+        return (
+            self.requirement_id, self.content_hash, self.version, self.test_file,
+            self.last_updated_ns, self.has_custom_code, self.fingerprint,
+        )
+
+    @property
+    def fingerprint(self) -> Optional[RequirementFingerprint]:
+        """Fingerprint of the requirement, built from its serialized form on first access"""
+        fingerprint = self._fingerprint
+        if isinstance(fingerprint, dict):
+            fingerprint = self._fingerprint = RequirementFingerprint.from_dict(fingerprint)
+        return fingerprint
+
+    @fingerprint.setter
+    def fingerprint(self, fingerprint: Optional[RequirementFingerprint]):
+        self._fingerprint = fingerprint
+
+    @property
+    def last_updated(self) -> datetime:
+        """Last update time as datetime (built on access)"""
+        return ns_to_datetime(self.last_updated_ns)
+
+    @last_updated.setter
+    def last_updated(self, value: datetime):
+        self.last_updated_ns = datetime_to_ns(value)
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization"""
+        fingerprint = self._fingerprint
+        if fingerprint is not None and not isinstance(fingerprint, dict):
+            fingerprint = fingerprint.to_dict()
+
         return {
             "requirement_id": self.requirement_id,
             "content_hash": self.content_hash,
             "version": self.version,
             "test_file": str(self.test_file) if self.test_file else None,
+            # ISO timestamp kept for releases that do not read the ns field
             "last_updated": self.last_updated.isoformat(),
+            "last_updated_ns": self.last_updated_ns,
             "has_custom_code": self.has_custom_code,
-            "fingerprint": self.fingerprint.to_dict() if self.fingerprint else None,
+            "fingerprint": fingerprint,
         }
 
     @classmethod
     def from_dict(cls, data: Dict) -> "RequirementState":
         """Create from dictionary"""
-        return cls(
-            requirement_id=data["requirement_id"],
+        req_state = cls(
+            requirement_id=sys.intern(data["requirement_id"]),
             content_hash=data["content_hash"],
             version=data["version"],
             test_file=Path(data["test_file"]) if data.get("test_file") else None,
-            last_updated=datetime.fromisoformat(data["last_updated"]),
+            last_updated_ns=_read_timestamp_ns(data, "last_updated"),
             has_custom_code=data.get("has_custom_code", False),
-            fingerprint=RequirementFingerprint.from_dict(data["fingerprint"]) if data.get("fingerprint") else None,
         )
+        # A serialized fingerprint is kept as is and only built when it is read
+        req_state._fingerprint = data.get("fingerprint") or None
+        return req_state
 
 
-@dataclass
+@dataclass(init=False, **DATACLASS_SLOTS)
 class TestFileState:
     """State of a test file"""
     file_path: Path
     requirements: List[str]  # Requirement IDs in this file
-    last_generated: datetime
+    last_generated_ns: int
     has_custom_code: bool = False
     backup_count: int = 0
 
+    def __init__(
+        self,
+        file_path: Path,
+        requirements: List[str],
+        last_generated: Optional[datetime] = None,
+        has_custom_code: bool = False,
+        backup_count: int = 0,
+        *,
+        last_generated_ns: Optional[int] = None
+    ):
+        self.file_path = file_path
+        self.requirements = requirements
+        self.last_generated_ns = _timestamp_ns(
+            last_generated, last_generated_ns, "last_generated"
+        )
+        self.has_custom_code = has_custom_code
+        self.backup_count = backup_count
+
+    @property
+    def last_generated(self) -> datetime:
+        """Last generation time as datetime (built on access)"""
+        return ns_to_datetime(self.last_generated_ns)
+
+    @last_generated.setter
+    def last_generated(self, value: datetime):
+        self.last_generated_ns = datetime_to_ns(value)
+
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
         return {
             "file_path": str(self.file_path),
             "requirements": self.requirements,
             "last_generated": self.last_generated.isoformat(),
+            "last_generated_ns": self.last_generated_ns,
             "has_custom_code": self.has_custom_code,
             "backup_count": self.backup_count,
         }
@@ -78,19 +206,29 @@ class TestFileState:
         return cls(
             file_path=Path(data["file_path"]),
             requirements=data["requirements"],
-            last_generated=datetime.fromisoformat(data["last_generated"]),
+            last_generated_ns=_read_timestamp_ns(data, "last_generated"),
             has_custom_code=data.get("has_custom_code", False),
             backup_count=data.get("backup_count", 0),
         )
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SyncState:
     """Complete sync state"""
     last_sync: Optional[datetime] = None
     requirements: Dict[str, RequirementState] = field(default_factory=dict)
     test_files: Dict[str, TestFileState] = field(default_factory=dict)
     sync_count: int = 0
+    # Requirement ID -> test file keys containing it (dict used as ordered set)
+    _req_to_files: Dict[str, Dict[str, None]] = field(init=False, repr=False, compare=False)
+    # Path -> interned test_files key, so each path is converted only once
+    _path_keys: Dict[Path, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._req_to_files = {}
+        self._path_keys = {}
+        for file_key, test_state in self.test_files.items():
+            self._index_test_file(file_key, test_state)
 
     def get_requirement(self, requirement_id: str) -> Optional[RequirementState]:
         """Get requirement state by ID"""
@@ -98,20 +236,46 @@ class SyncState:
 
     def add_requirement(self, req_state: RequirementState):
         """Add or update requirement state"""
-        self.requirements[req_state.requirement_id] = req_state
+        # Requirement IDs are looked up repeatedly and shared by the indexes
+        req_id = sys.intern(req_state.requirement_id)
+        self.requirements[req_id] = req_state
 
     def remove_requirement(self, requirement_id: str):
         """Remove requirement state"""
         if requirement_id in self.requirements:
             del self.requirements[requirement_id]
 
+    def _path_key(self, file_path: Path) -> str:
+        """Get the test_files key for a path"""
+        key = self._path_keys.get(file_path)
+        if key is None:
+            key = self._path_keys[file_path] = sys.intern(str(file_path))
+        return key
+
     def get_test_file(self, file_path: Path) -> Optional[TestFileState]:
         """Get test file state"""
-        return self.test_files.get(str(file_path))
+        return self.test_files.get(self._path_key(file_path))
 
     def add_test_file(self, test_state: TestFileState):
         """Add or update test file state"""
-        self.test_files[str(test_state.file_path)] = test_state
+        file_key = self._path_key(test_state.file_path)
+
+        old_state = self.test_files.get(file_key)
+        if old_state is not None:
+            for req_id in old_state.requirements:
+                files = self._req_to_files.get(req_id)
+                if files is not None:
+                    files.pop(file_key, None)
+                    if not files:
+                        del self._req_to_files[req_id]
+
+        self.test_files[file_key] = test_state
+        self._index_test_file(file_key, test_state)
+
+    def _index_test_file(self, file_key: str, test_state: TestFileState):
+        """Record the requirements of a test file in the reverse index"""
+        for req_id in test_state.requirements:
+            self._req_to_files.setdefault(sys.intern(req_id), {})[file_key] = None
 
     def get_requirements_in_file(self, file_path: Path) -> List[str]:
         """Get all requirement IDs in a test file"""
@@ -120,15 +284,17 @@ class SyncState:
 
     def get_files_for_requirement(self, requirement_id: str) -> List[Path]:
         """Get all test files that contain a requirement"""
-        files = []
-        for test_state in self.test_files.values():
-            if requirement_id in test_state.requirements:
-                files.append(test_state.file_path)
-        return files
+        # test_files is a plain dict and may have been edited without add_test_file
+        test_states = [
+            self.test_files.get(file_key)
+            for file_key in self._req_to_files.get(requirement_id, ())
+        ]
+        return [test_state.file_path for test_state in test_states if test_state is not None]
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization"""
         return {
+            "version": STATE_FORMAT_VERSION,
             "last_sync": self.last_sync.isoformat() if self.last_sync else None,
             "sync_count": self.sync_count,
             "requirements": {
@@ -148,7 +314,7 @@ class SyncState:
             last_sync=datetime.fromisoformat(data["last_sync"]) if data.get("last_sync") else None,
             sync_count=data.get("sync_count", 0),
             requirements={
-                req_id: RequirementState.from_dict(req_data)
+                sys.intern(req_id): RequirementState.from_dict(req_data)
                 for req_id, req_data in data.get("requirements", {}).items()
             },
             test_files={
@@ -195,14 +361,24 @@ class SyncStateManager:
             return self.state
 
         try:
-            with open(self.state_file, 'r') as f:
-                data = json.load(f)
+            data = json_loads(self.state_file.read_bytes())
+
+            version = data.get("version", 1)
+            if version > STATE_FORMAT_VERSION:
+                raise UnsupportedStateVersionError(
+                    f"Sync state format {version} in {self.state_file} is newer than "
+                    f"supported format {STATE_FORMAT_VERSION}; upgrade sysml2pytest"
+                )
 
             self.state = SyncState.from_dict(data)
             logger.info(f"Loaded sync state: {len(self.state.requirements)} requirements, "
                        f"{len(self.state.test_files)} test files")
             return self.state
 
+        except UnsupportedStateVersionError:
+            # Falling back to an empty state would overwrite the file on save
+            raise
+
         except Exception as e:
             logger.error(f"Failed to load sync state: {e}")
             self.state = SyncState()
@@ -216,9 +392,7 @@ class SyncStateManager:
 
         try:
             self.state_dir.mkdir(parents=True, exist_ok=True)
-
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state.to_dict(), f, indent=2)
+            write_atomic(self.state_file, json_dumps(self.state.to_dict()))
 
             logger.info(f"Saved sync state to {self.state_file}")
 
@@ -244,7 +418,7 @@ class SyncStateManager:
             content_hash=content_hash,
             version=version,
             test_file=test_file,
-            last_updated=datetime.now(),
+            last_updated_ns=time.time_ns(),
             has_custom_code=has_custom_code,
             fingerprint=fingerprint,
         )
@@ -264,7 +438,7 @@ class SyncStateManager:
         test_state = TestFileState(
             file_path=file_path,
             requirements=requirements,
-            last_generated=datetime.now(),
+            last_generated_ns=time.time_ns(),
             has_custom_code=has_custom_code,
         )
 
@@ -301,13 +475,12 @@ class SyncStateManager:
 
         return list(self.state.requirements.values())
 
-    def get_stale_requirements(self, current_ids: Set[str]) -> List[str]:
+    def get_stale_requirements(self, current_ids: Set[str]) -> Set[str]:
         """Get requirement IDs that are no longer in current set (deleted)"""
         if self.state is None:
-            return []
+            return set()
 
-        tracked_ids = set(self.state.requirements.keys())
-        return list(tracked_ids - current_ids)
+        return self.state.requirements.keys() - current_ids
 
     def cleanup_stale_requirements(self, current_ids: Set[str]):
         """Remove requirements that no longer exist"""
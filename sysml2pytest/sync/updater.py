@@ -5,21 +5,39 @@ Applies requirement changes to existing test files while preserving custom code
 """
 
 import logging
+import os
+import re
 import shutil
+import time
 from pathlib import Path
 from dataclasses import dataclass
 from typing import List, Optional, Dict
 from datetime import datetime
 from enum import Enum
 
-from .parser import TestFileParser, ParsedTest
-from .fingerprint import RequirementFingerprint, compute_requirement_hash
+from .._compat import write_atomic
+from .parser import TestFileParser, ParsedTest, CUSTOM_START, CUSTOM_END
+from .fingerprint import compute_requirement_hash
 from .detector import ChangeSeverity
 from ..extractor.models import Requirement
 from ..generator.generator import PytestGenerator, GeneratorConfig
 
 logger = logging.getLogger(__name__)
 
+# Lines rewritten by _update_metadata_in_code: metadata comments and requirement markers
+_METADATA_LINE_RE = re.compile(
+    r'^(?:# (content_hash|version|generated_at):[^\r\n]*'
+    r'|[^\r\n]*@pytest\.mark\.requirement\([^\r\n]*)$',
+    re.MULTILINE
+)
+# First CUSTOM region in generated code: (start marker line)(body lines)(end marker line)
+_CUSTOM_BLOCK_RE = re.compile(
+    r'^([^\S\n]*' + re.escape(CUSTOM_START) + r'[^\S\n]*\n)'
+    r'((?:[^\n]*\n)*?)'
+    r'([^\S\n]*' + re.escape(CUSTOM_END) + r'[^\S\n]*)$',
+    re.MULTILINE
+)
+
 
 class UpdateStrategy(Enum):
     """Update strategies for syncing tests"""
@@ -92,7 +110,8 @@ class TestUpdater:
         requirement: Requirement,
         strategy: UpdateStrategy = UpdateStrategy.SURGICAL,
         severity: ChangeSeverity = ChangeSeverity.MODERATE,
-        new_version: int = 2
+        new_version: int = 2,
+        generated_at: Optional[str] = None
     ) -> UpdateResult:
         """
         Update a test file with changed requirement
@@ -103,6 +122,7 @@ class TestUpdater:
             strategy: Update strategy to use
             severity: Change severity level
             new_version: New version number
+            generated_at: ISO timestamp for the generated_at metadata (default: now)
 
         Returns:
             UpdateResult with details of the update
@@ -113,13 +133,36 @@ class TestUpdater:
                 strategy = self._choose_strategy(severity)
                 logger.info(f"Hybrid mode: using {strategy.value} for severity {severity.value}")
 
+            # Parsed and hashed once; the up-to-date check and the strategy share both
+            parsed_tests = self.parser.parse_file(test_file)
+            content_hash = compute_requirement_hash(requirement)
+
+            if self._is_up_to_date(parsed_tests, requirement, new_version, content_hash):
+                logger.info(f"{test_file} is already up to date, skipping update")
+                return UpdateResult(
+                    file_path=test_file,
+                    success=True,
+                    strategy_used=strategy,
+                    version_old=new_version,
+                    version_new=new_version
+                )
+
             # Execute strategy
             if strategy == UpdateStrategy.FULL_REGEN:
-                return self._full_regeneration(test_file, requirement, new_version)
+                return self._full_regeneration(
+                    test_file, parsed_tests, requirement, new_version, content_hash,
+                    generated_at
+                )
             elif strategy == UpdateStrategy.SURGICAL:
-                return self._surgical_update(test_file, requirement, new_version)
+                return self._surgical_update(
+                    test_file, parsed_tests, requirement, new_version, content_hash,
+                    generated_at
+                )
             elif strategy == UpdateStrategy.SIDE_BY_SIDE:
-                return self._side_by_side_update(test_file, requirement, new_version)
+                return self._side_by_side_update(
+                    test_file, parsed_tests, requirement, new_version, content_hash,
+                    generated_at
+                )
             else:
                 return UpdateResult(
                     file_path=test_file,
@@ -148,19 +191,71 @@ class TestUpdater:
         else:  # MAJOR
             return UpdateStrategy.SIDE_BY_SIDE
 
-    def _create_backup(self, test_file: Path) -> Optional[Path]:
-        """Create backup of test file"""
+    def _is_up_to_date(
+        self,
+        parsed_tests: List[ParsedTest],
+        requirement: Requirement,
+        new_version: int,
+        content_hash: str
+    ) -> bool:
+        """Check if the parsed test file already holds this requirement content and version"""
+        requirement_id = requirement.metadata.id or requirement.metadata.name
+        for test in parsed_tests:
+            if test.metadata and test.metadata.requirement_id == requirement_id:
+                return (
+                    test.metadata.version == new_version
+                    and test.metadata.content_hash == content_hash
+                )
+        return False
+
+    def _replace_test_file(self, test_file: Path, data: bytes) -> Optional[Path]:
+        """
+        Back up and replace test file contents, dropping its stale parse result
+
+        Returns:
+            Path to the backup, if one was created
+        """
+        # The old inode is moved out of the way, so a hard link keeps the old contents
+        backup_path = self._create_backup(test_file, link=True)
+        try:
+            # Replace a symlink's target rather than the link itself
+            write_atomic(test_file.resolve(), data)
+        except Exception:
+            # The link would still share the live file's inode
+            if backup_path is not None:
+                backup_path.unlink()
+            raise
+        finally:
+            self.parser.invalidate(test_file)
+
+        return backup_path
+
+    def _create_backup(self, test_file: Path, link: bool = False) -> Optional[Path]:
+        """
+        Create backup of test file
+
+        Args:
+            test_file: Path to test file
+            link: Hard link instead of copying; only safe when the file is
+                replaced via os.replace right after, never written in place
+        """
         if not self.create_backups:
             return None
 
         try:
             self.backup_dir.mkdir(parents=True, exist_ok=True)
 
-            timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+            timestamp = time.strftime("%Y%m%dT%H%M%S")
             backup_name = f"{test_file.name}.backup.{timestamp}"
             backup_path = self.backup_dir / backup_name
 
-            shutil.copy2(test_file, backup_path)
+            if link:
+                try:
+                    os.link(test_file.resolve(), backup_path)
+                except OSError:
+                    link = False  # e.g. backup dir on another filesystem
+            if not link:
+                shutil.copy2(test_file, backup_path)
             logger.info(f"Created backup: {backup_path}")
 
             return backup_path
@@ -172,8 +267,11 @@ class TestUpdater:
     def _full_regeneration(
         self,
         test_file: Path,
+        parsed_tests: List[ParsedTest],
         requirement: Requirement,
-        new_version: int
+        new_version: int,
+        content_hash: str,
+        generated_at: Optional[str] = None
     ) -> UpdateResult:
         """
         Full regeneration strategy - deletes and regenerates test file
@@ -182,23 +280,22 @@ class TestUpdater:
         """
         logger.warning(f"Full regeneration will lose custom code in {test_file}")
 
-        # Create backup
-        backup_path = self._create_backup(test_file)
-
-        # Parse old file to get version
-        old_tests = self.parser.parse_file(test_file)
-        old_version = old_tests[0].metadata.version if old_tests and old_tests[0].metadata else 1
+        # Version of the old file
+        old_version = (
+            parsed_tests[0].metadata.version
+            if parsed_tests and parsed_tests[0].metadata else 1
+        )
 
         # Generate new test
         test_code = self.generator._generate_test_for_requirement(requirement)
 
         # Update version and metadata in generated code
-        content_hash = compute_requirement_hash(requirement)
-        test_code = self._update_metadata_in_code(test_code, content_hash, new_version)
+        test_code = self._update_metadata_in_code(
+            test_code, content_hash, new_version, generated_at
+        )
 
-        # Write new file
-        with open(test_file, 'w') as f:
-            f.write(test_code)
+        # Back up and write new file
+        backup_path = self._replace_test_file(test_file, test_code.encode('utf-8'))
 
         lines_updated = len(test_code.splitlines())
 
@@ -216,18 +313,15 @@ class TestUpdater:
     def _surgical_update(
         self,
         test_file: Path,
+        parsed_tests: List[ParsedTest],
         requirement: Requirement,
-        new_version: int
+        new_version: int,
+        content_hash: str,
+        generated_at: Optional[str] = None
     ) -> UpdateResult:
         """
         Surgical update strategy - updates generated sections, preserves custom code
         """
-        # Create backup
-        backup_path = self._create_backup(test_file)
-
-        # Parse existing test file
-        parsed_tests = self.parser.parse_file(test_file)
-
         if not parsed_tests:
             logger.error(f"No tests found in {test_file}")
             return UpdateResult(
@@ -260,33 +354,33 @@ class TestUpdater:
         new_test_code = self.generator._generate_test_for_requirement(requirement)
 
         # Update version and hash in new code
-        content_hash = compute_requirement_hash(requirement)
         new_test_code = self._update_metadata_in_code(
             new_test_code,
             content_hash,
-            new_version
+            new_version,
+            generated_at
         )
 
         # Merge: Replace old test with new, preserving custom code
         merged_code = self._merge_test_code(target_test, new_test_code)
 
-        # Read full file
-        with open(test_file, 'r') as f:
-            full_content = f.read()
-
-        # Replace old test with merged version
-        # Extract old test content
-        old_test_lines = full_content.splitlines()
-        old_test_content = '\n'.join(old_test_lines[target_test.start_line:target_test.end_line + 1])
-
-        updated_content = full_content.replace(old_test_content, merged_code)
-
-        # Write updated file
-        with open(test_file, 'w') as f:
-            f.write(updated_content)
+        # Splice merged version into the file contents the test was parsed from, in
+        # place of the old test, keeping the line ending the old test finished with.
+        # update_test_file parsed the file when the update started
+        source = target_test.source
+        start, end = target_test.span
+        if source[end - 2:end] == b'\r\n':
+            merged_code = merged_code.replace('\n', '\r\n') + '\r\n'
+        elif source[end - 1:end] == b'\n':
+            merged_code += '\n'
+
+        # Back up and write updated file
+        backup_path = self._replace_test_file(
+            test_file, source[:start] + merged_code.encode('utf-8') + source[end:]
+        )
 
         # Count preserved custom lines
-        custom_line_count = sum(len(region.content) for region in target_test.custom_regions)
+        custom_line_count = target_test.custom_line_count
         updated_line_count = len(merged_code.splitlines())
 
         return UpdateResult(
@@ -303,29 +397,34 @@ class TestUpdater:
     def _side_by_side_update(
         self,
         test_file: Path,
+        parsed_tests: List[ParsedTest],
         requirement: Requirement,
-        new_version: int
+        new_version: int,
+        content_hash: str,
+        generated_at: Optional[str] = None
     ) -> UpdateResult:
         """
         Side-by-side strategy - generates .new file for manual review
         """
         # No backup needed - original file unchanged
 
-        # Parse old file to get version
-        old_tests = self.parser.parse_file(test_file)
-        old_version = old_tests[0].metadata.version if old_tests and old_tests[0].metadata else 1
+        # Version of the old file
+        old_version = (
+            parsed_tests[0].metadata.version
+            if parsed_tests and parsed_tests[0].metadata else 1
+        )
 
         # Generate new test
         test_code = self.generator._generate_test_for_requirement(requirement)
 
         # Update version and metadata in generated code
-        content_hash = compute_requirement_hash(requirement)
-        test_code = self._update_metadata_in_code(test_code, content_hash, new_version)
+        test_code = self._update_metadata_in_code(
+            test_code, content_hash, new_version, generated_at
+        )
 
         # Write .new file
         new_file_path = test_file.with_suffix(test_file.suffix + '.new')
-        with open(new_file_path, 'w') as f:
-            f.write(test_code)
+        new_file_path.write_bytes(test_code.encode('utf-8'))
 
         lines_updated = len(test_code.splitlines())
 
@@ -351,53 +450,35 @@ class TestUpdater:
         Returns:
             Merged test code with custom regions preserved
         """
-        # Parse new code to identify insertion points for custom code
-        new_lines = new_code.splitlines()
-
-        # Find CUSTOM region markers in new code
-        custom_region_indices = []
-        for i, line in enumerate(new_lines):
-            if line.strip() == self.parser.CUSTOM_START:
-                custom_region_indices.append(i)
-
-        # If we have custom code from old test, insert it
-        if old_test.custom_regions and custom_region_indices:
-            # Take the first custom region from old test
-            old_custom_content = old_test.custom_regions[0].content
+        if not old_test.custom_regions:
+            return new_code
 
-            # Insert after CUSTOM_START marker
-            insert_idx = custom_region_indices[0] + 1
-
-            # Remove placeholder comment in new code
-            # Find CUSTOM_END
-            custom_end_idx = -1
-            for i in range(insert_idx, len(new_lines)):
-                if new_lines[i].strip() == self.parser.CUSTOM_END:
-                    custom_end_idx = i
-                    break
-
-            if custom_end_idx > insert_idx:
-                # Remove lines between CUSTOM_START and CUSTOM_END
-                new_lines = new_lines[:insert_idx] + new_lines[custom_end_idx:]
+        # Take the first custom region from old test
+        old_custom_code = ''.join(
+            f'{line}\n' for line in old_test.custom_regions[0].content
+        )
 
-                # Insert old custom code
-                for i, custom_line in enumerate(old_custom_content):
-                    new_lines.insert(insert_idx + i, custom_line)
+        def replace_placeholder(match: re.Match) -> str:
+            # Keep regions without placeholder lines as they are
+            if not match.group(2):
+                return match.group(0)
+            return match.group(1) + old_custom_code + match.group(3)
 
-        return '\n'.join(new_lines)
+        # Replace placeholder lines between CUSTOM_START and CUSTOM_END with old custom code
+        return _CUSTOM_BLOCK_RE.sub(replace_placeholder, new_code, count=1)
 
     def _update_version_in_code(self, code: str, version: int) -> str:
         """Update version number in test code"""
         lines = code.splitlines()
         updated_lines = []
+        version_repl = f'version={version}'
 
         for line in lines:
             if line.startswith("# version:"):
                 updated_lines.append(f"# version: {version}")
             elif "@pytest.mark.requirement(" in line and "version=" in line:
                 # Update version in decorator
-                import re
-                line = re.sub(r'version=\d+', f'version={version}', line)
+                line = _replace_version(line, version_repl)
                 updated_lines.append(line)
             else:
                 updated_lines.append(line)
@@ -408,29 +489,25 @@ class TestUpdater:
         self,
         code: str,
         content_hash: str,
-        version: int
+        version: int,
+        generated_at: Optional[str] = None
     ) -> str:
-        """Update metadata (hash, version) in test code"""
-        lines = code.splitlines()
-        updated_lines = []
-
-        for line in lines:
-            if line.startswith("# content_hash:"):
-                updated_lines.append(f"# content_hash: {content_hash}")
-            elif line.startswith("# version:"):
-                updated_lines.append(f"# version: {version}")
-            elif line.startswith("# generated_at:"):
-                timestamp = datetime.now().isoformat()
-                updated_lines.append(f"# generated_at: {timestamp}")
-            elif "@pytest.mark.requirement(" in line and "version=" in line:
-                # Update version in decorator
-                import re
-                line = re.sub(r'version=\d+', f'version={version}', line)
-                updated_lines.append(line)
-            else:
-                updated_lines.append(line)
-
-        return '\n'.join(updated_lines)
+        """Update metadata (hash, version, timestamp) in test code"""
+        replacements = {
+            "content_hash": f"# content_hash: {content_hash}",
+            "version": f"# version: {version}",
+            "generated_at": f"# generated_at: {generated_at or datetime.now().isoformat()}",
+        }
+        version_repl = f'version={version}'
+
+        def replace_line(match: re.Match) -> str:
+            key = match.group(1)
+            if key:
+                return replacements[key]
+            # Update version in decorator
+            return _replace_version(match.group(0), version_repl)
+
+        return _METADATA_LINE_RE.sub(replace_line, code)
 
     def update_multiple_tests(
         self,
@@ -448,6 +525,8 @@ class TestUpdater:
             List of UpdateResult objects
         """
         results = []
+        # Every file in a batch shares one generated_at stamp
+        generated_at = datetime.now().isoformat()
 
         for update_spec in updates:
             result = self.update_test_file(
@@ -455,7 +534,8 @@ class TestUpdater:
                 requirement=update_spec['requirement'],
                 strategy=strategy,
                 severity=update_spec.get('severity', ChangeSeverity.MODERATE),
-                new_version=update_spec.get('new_version', 2)
+                new_version=update_spec.get('new_version', 2),
+                generated_at=generated_at
             )
             results.append(result)
 
@@ -490,3 +570,28 @@ class TestUpdater:
             for result in results:
                 if not result.success:
                     print(f"  - {result.file_path}: {result.error_message}")
+
+
+def _replace_version(line: str, version_repl: str) -> str:
+    """Replace every 'version=<digits>' in line with version_repl"""
+    idx = line.find('version=')
+    if idx < 0:
+        return line
+
+    parts = []
+    start = 0
+    while idx >= 0:
+        end = idx + 8
+        while end < len(line) and line[end].isdecimal():
+            end += 1
+
+        if end > idx + 8:
+            parts.append(line[start:idx])
+            parts.append(version_repl)
+            start = end
+            idx = line.find('version=', end)
+        else:
+            idx = line.find('version=', idx + 1)
+
+    parts.append(line[start:])
+    return ''.join(parts)
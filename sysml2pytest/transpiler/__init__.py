@@ -4,11 +4,12 @@ SysML V2 to Python Constraint Transpiler
 Converts SysML V2 constraint expressions to Python code
 """
 
-from .transpiler import ConstraintTranspiler, TranspilationError
+from .transpiler import ConstraintTranspiler, TranspilationError, DEFAULT_TRANSPILER
 from .hypothesis_strategy import HypothesisStrategyGenerator
 
 __all__ = [
     "ConstraintTranspiler",
     "TranspilationError",
+    "DEFAULT_TRANSPILER",
     "HypothesisStrategyGenerator",
 ]
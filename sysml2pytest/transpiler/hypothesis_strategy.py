@@ -3,19 +3,31 @@ Generate Hypothesis testing strategies from SysML V2 requirement attributes
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 
 from ..extractor.models import RequirementAttribute, AttributeType
 
 logger = logging.getLogger(__name__)
 
+# Constraint identifiers and numbers are ASCII, like the transpiler's patterns
+# Pattern: number <= var or var >= number (includes negative numbers)
+_MIN_PATTERN = re.compile(
+    r'(-?\d+\.?\d*)\s*<=\s*(\w+)|(\w+)\s*>=\s*(-?\d+\.?\d*)', re.ASCII
+)
+# Pattern: var <= number or number >= var (includes negative numbers)
+_MAX_PATTERN = re.compile(
+    r'(\w+)\s*<=\s*(-?\d+\.?\d*)|(-?\d+\.?\d*)\s*>=\s*(\w+)', re.ASCII
+)
 
-@dataclass
+
+@dataclass(frozen=True)
 class StrategyConfig:
     """Configuration for generating a Hypothesis strategy"""
     strategy_code: str
-    imports: List[str]
+    imports: Tuple[str, ...]
     description: str
 
 
@@ -27,9 +39,15 @@ class HypothesisStrategyGenerator:
     Hypothesis strategies for property-based testing.
     """
 
+    # Maximum number of distinct (type, bounds) strategies kept by generate_strategy
+    CACHE_SIZE = 256
+
     def __init__(self):
         """Initialize strategy generator"""
-        self.base_imports = ["from hypothesis import strategies as st"]
+        self.base_imports = ("from hypothesis import strategies as st",)
+        self._cached_strategy = lru_cache(maxsize=self.CACHE_SIZE, typed=True)(
+            self._strategy_for_key
+        )
 
     def generate_strategy(
         self,
@@ -46,6 +64,37 @@ class HypothesisStrategyGenerator:
         Returns:
             StrategyConfig with strategy code and required imports
         """
+        # Only the type and bounds affect the strategy, so equal keys share one result
+        try:
+            ranges_key = tuple(
+                (key, type(value), value) for key, value in sorted((constraint_ranges or {}).items())
+            )
+            return self._cached_strategy(
+                attribute.type, attribute.min_value, attribute.max_value, ranges_key
+            )
+        except TypeError:  # Unhashable bound values
+            return self._build_strategy(attribute, constraint_ranges)
+
+    def _strategy_for_key(
+        self,
+        attr_type: AttributeType,
+        min_value: Optional[float],
+        max_value: Optional[float],
+        ranges_key: Tuple[Tuple[str, type, Any], ...]
+    ) -> StrategyConfig:
+        """Build the strategy for a generate_strategy cache key"""
+        attribute = RequirementAttribute(
+            name="", type=attr_type, min_value=min_value, max_value=max_value
+        )
+        constraint_ranges = {key: value for key, _, value in ranges_key} or None
+        return self._build_strategy(attribute, constraint_ranges)
+
+    def _build_strategy(
+        self,
+        attribute: RequirementAttribute,
+        constraint_ranges: Optional[Dict[str, Any]] = None
+    ) -> StrategyConfig:
+        """Dispatch to the strategy builder for the attribute type"""
         if attribute.type == AttributeType.INTEGER:
             return self._generate_integer_strategy(attribute, constraint_ranges)
         elif attribute.type == AttributeType.REAL:
@@ -78,22 +127,21 @@ class HypothesisStrategyGenerator:
             max_val = int(constraint_ranges["max"])
 
         # Build strategy
-        parts = []
-        if min_val is not None:
-            parts.append(f"min_value={min_val}")
-        if max_val is not None:
-            parts.append(f"max_value={max_val}")
-
-        if parts:
-            strategy = f"st.integers({', '.join(parts)})"
-            desc = f"Integers in range [{min_val or '-∞'}, {max_val or '∞'}]"
-        else:
+        if min_val is None and max_val is None:
             strategy = "st.integers()"
             desc = "Integers (unbounded)"
+        else:
+            if max_val is None:
+                strategy = f"st.integers(min_value={min_val})"
+            elif min_val is None:
+                strategy = f"st.integers(max_value={max_val})"
+            else:
+                strategy = f"st.integers(min_value={min_val}, max_value={max_val})"
+            desc = f"Integers in range [{min_val or '-∞'}, {max_val or '∞'}]"
 
         return StrategyConfig(
             strategy_code=strategy,
-            imports=self.base_imports.copy(),
+            imports=self.base_imports,
             description=desc
         )
 
@@ -116,22 +164,23 @@ class HypothesisStrategyGenerator:
         elif constraint_ranges and "max" in constraint_ranges:
             max_val = float(constraint_ranges["max"])
 
-        parts = []
-        if min_val is not None:
-            parts.append(f"min_value={min_val}")
-        if max_val is not None:
-            parts.append(f"max_value={max_val}")
-
-        # Add allow_nan=False, allow_infinity=False for safety
-        parts.append("allow_nan=False")
-        parts.append("allow_infinity=False")
-
-        strategy = f"st.floats({', '.join(parts)})"
+        # Always pass allow_nan=False, allow_infinity=False for safety
+        if min_val is None and max_val is None:
+            strategy = "st.floats(allow_nan=False, allow_infinity=False)"
+        elif max_val is None:
+            strategy = f"st.floats(min_value={min_val}, allow_nan=False, allow_infinity=False)"
+        elif min_val is None:
+            strategy = f"st.floats(max_value={max_val}, allow_nan=False, allow_infinity=False)"
+        else:
+            strategy = (
+                f"st.floats(min_value={min_val}, max_value={max_val}, "
+                f"allow_nan=False, allow_infinity=False)"
+            )
         desc = f"Floats in range [{min_val or '-∞'}, {max_val or '∞'}]"
 
         return StrategyConfig(
             strategy_code=strategy,
-            imports=self.base_imports.copy(),
+            imports=self.base_imports,
             description=desc
         )
 
@@ -142,7 +191,7 @@ class HypothesisStrategyGenerator:
         """Generate strategy for boolean attributes"""
         return StrategyConfig(
             strategy_code="st.booleans()",
-            imports=self.base_imports.copy(),
+            imports=self.base_imports,
             description="Boolean values (True/False)"
         )
 
@@ -174,7 +223,7 @@ class HypothesisStrategyGenerator:
 
         return StrategyConfig(
             strategy_code=strategy,
-            imports=self.base_imports.copy(),
+            imports=self.base_imports,
             description=desc
         )
 
@@ -186,7 +235,7 @@ class HypothesisStrategyGenerator:
         logger.warning(f"Unknown attribute type {attribute.type}, using st.nothing()")
         return StrategyConfig(
             strategy_code="st.nothing()",
-            imports=self.base_imports.copy(),
+            imports=self.base_imports,
             description="No strategy (unknown type)"
         )
 
@@ -230,22 +279,15 @@ class HypothesisStrategyGenerator:
             This is a simplified implementation. Production version should
             use proper expression parsing.
         """
-        import re
-
         ranges = {}
 
-        # Pattern: number <= var or var >= number (includes negative numbers)
-        min_pattern = r'(-?\d+\.?\d*)\s*<=\s*(\w+)|(\w+)\s*>=\s*(-?\d+\.?\d*)'
-        # Pattern: var <= number or number >= var (includes negative numbers)
-        max_pattern = r'(\w+)\s*<=\s*(-?\d+\.?\d*)|(-?\d+\.?\d*)\s*>=\s*(\w+)'
-
-        for match in re.finditer(min_pattern, constraint_expr):
+        for match in _MIN_PATTERN.finditer(constraint_expr):
             if match.group(1):
                 ranges['min'] = float(match.group(1))
             elif match.group(4):
                 ranges['min'] = float(match.group(4))
 
-        for match in re.finditer(max_pattern, constraint_expr):
+        for match in _MAX_PATTERN.finditer(constraint_expr):
             if match.group(2):
                 ranges['max'] = float(match.group(2))
             elif match.group(3):
@@ -3,23 +3,68 @@ Transpiler for converting SysML V2 constraint expressions to Python
 """
 
 import re
+import sys
 import logging
-from typing import Dict, Set, Optional, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Set, Optional, List, Tuple
 from dataclasses import dataclass
 
+from .._compat import DATACLASS_SLOTS
+
 logger = logging.getLogger(__name__)
 
+# Tokens that matter for transpilation; all other text is copied through unchanged.
+# Attribute names (after a '.') are not names of their own
+_TOKEN_PATTERN = re.compile(
+    r'(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+    r'|(?P<name>(?<!\.)\b[a-zA-Z_][a-zA-Z0-9_]*\b)'
+    r'|(?P<open>\()'
+    r'|(?P<close>\))'
+)
+
+# Names outside string literals, excluding attribute names; literals match too
+# so their contents are skipped
+_NAME_PATTERN = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|((?<!\.)\b[a-zA-Z_][a-zA-Z0-9_]*\b)'
+)
+
+# Identifiers in Python code
+_IDENTIFIER_PATTERN = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b')
+
+# Comparison and logical operators counted by _count_operators; each is counted
+# on its own, so e.g. '<=' also counts as '<'
+_OPERATORS = ("<=", ">=", "==", "!=", "<", ">", " and ", " or ", " not ")
+
+# Rewrites applied by ExpressionOptimizer.simplify; each alternative captures
+# the text that replaces the whole match in exactly one named group
+_SIMPLIFY_PATTERN = re.compile(
+    r'\(not \(not (?P<double_negation>[^)]+)\)\)'
+    r'|(?P<and_true>[a-zA-Z_]\w*) and True'
+    r'|True and (?P<true_and>[a-zA-Z_]\w*)'
+    r'|(?P<or_false>[a-zA-Z_]\w*) or False'
+    r'|False or (?P<false_or>[a-zA-Z_]\w*)'
+)
+
+# Python keywords and operators that are not variable references
+_PYTHON_KEYWORDS = frozenset({
+    "and", "or", "not", "True", "False", "None",
+    "if", "else", "elif", "for", "while", "in", "is"
+})
+
 
 class TranspilationError(Exception):
     """Error during constraint transpilation"""
-    pass
+
+    def __init__(self, message: str, *, expression: Optional[str] = None):
+        super().__init__(message)
+        self.expression = expression
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class TranspiledConstraint:
     """Result of transpiling a constraint expression"""
     python_code: str
-    referenced_variables: Set[str]
+    referenced_variables: FrozenSet[str]
     operator_count: int
     original_expression: str
 
@@ -36,28 +81,16 @@ class ConstraintTranspiler:
     - Attribute/variable references
     """
 
-    # Operator mappings from SysML V2 to Python
-    OPERATOR_MAP = {
-        "and": "and",
-        "or": "or",
-        "not": "not",
-        "implies": "not {0} or {1}",  # A implies B == (not A) or B
-        "==": "==",
-        "!=": "!=",
-        "<=": "<=",
-        ">=": ">=",
-        "<": "<",
-        ">": ">",
-        "+": "+",
-        "-": "-",
-        "*": "*",
-        "/": "/",
-        "in": "in",
-    }
+    # Pattern matching identifiers
+    variable_pattern = _IDENTIFIER_PATTERN
+
+    # Maximum number of distinct expressions kept by transpile
+    CACHE_SIZE = 4096
 
     def __init__(self):
         """Initialize transpiler"""
-        self.variable_pattern = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b')
+        # Results are immutable, so repeated expressions share one result
+        self._transpile_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._transpile)
 
     def transpile(self, expression: str) -> TranspiledConstraint:
         """
@@ -72,35 +105,34 @@ class ConstraintTranspiler:
         Raises:
             TranspilationError: If expression cannot be transpiled
         """
+        return self._transpile_cached(expression)
+
+    def _transpile(self, expression: str) -> TranspiledConstraint:
+        """Transpile an expression without consulting the cache"""
         if not expression or not expression.strip():
-            raise TranspilationError("Empty expression")
+            raise TranspilationError("Empty expression", expression=expression)
 
         try:
             # Clean and normalize expression
             cleaned = self._clean_expression(expression)
 
-            # Handle 'implies' operator specially
-            if "implies" in cleaned:
-                cleaned = self._handle_implies(cleaned)
-
-            # Transpile to Python
-            python_code = self._transpile_expression(cleaned)
-
-            # Extract referenced variables
-            variables = self._extract_variables(python_code)
+            # Rewrite 'implies' and extract referenced variables in one scan
+            python_code, variables = self._transpile_expression(cleaned)
 
             # Count operators
             op_count = self._count_operators(python_code)
 
             return TranspiledConstraint(
                 python_code=python_code,
-                referenced_variables=variables,
+                referenced_variables=frozenset(variables),
                 operator_count=op_count,
                 original_expression=expression
             )
 
         except Exception as e:
-            raise TranspilationError(f"Failed to transpile '{expression}': {e}")
+            raise TranspilationError(
+                f"Failed to transpile '{expression}': {e}", expression=expression
+            ) from e
 
     def _clean_expression(self, expr: str) -> str:
         """Clean and normalize expression"""
@@ -112,63 +144,87 @@ class ConstraintTranspiler:
 
         return expr.strip()
 
-    def _handle_implies(self, expr: str) -> str:
-        """
-        Handle 'implies' operator
-
-        A implies B  →  (not A) or B
+    def _transpile_expression(self, expr: str) -> Tuple[str, Set[str]]:
         """
-        # Simple regex to find 'implies' and split
-        # This is a simplified version; full parser would handle nested cases
-        if " implies " in expr:
-            parts = expr.split(" implies ", 1)
-            if len(parts) == 2:
-                left, right = parts
-                return f"(not ({left.strip()})) or ({right.strip()})"
+        Transpile expression to Python and collect referenced variables
 
-        return expr
-
-    def _transpile_expression(self, expr: str) -> str:
-        """
-        Transpile expression to Python
+        SysML V2 uses Python-compatible syntax for basic expressions, so only
+        'implies' needs rewriting: A implies B  →  (not (A)) or (B). It binds
+        looser than 'or', is right-associative and is rewritten inside
+        parentheses too.
 
-        This is a simplified transpiler that handles common cases.
-        A full implementation would use a proper parser (e.g., Lark).
+        Returns:
+            Tuple of (Python code, referenced variable names)
         """
-        python_expr = expr
-
-        # No operator replacement needed for most cases
-        # SysML V2 uses Python-compatible syntax for basic expressions
-
-        return python_expr
+        if "implies" not in expr:
+            # Nothing to rewrite; the expression is already Python
+            return expr, self._extract_variables(expr)
+
+        variables: Set[str] = set()
+        # Stack of open groups; a group is a list of 'implies' operands,
+        # and an operand is a list of text pieces
+        groups: List[List[List[str]]] = [[[]]]
+
+        pos = 0
+        for match in _TOKEN_PATTERN.finditer(expr):
+            operand = groups[-1][-1]
+            operand.append(expr[pos:match.start()])
+            pos = match.end()
+            token = match.group()
+            kind = match.lastgroup
+
+            if kind == "name":
+                if token == "implies":
+                    groups[-1].append([])
+                    continue
+                if token not in _PYTHON_KEYWORDS:
+                    # Attribute names recur across many constraints
+                    variables.add(sys.intern(token))
+                operand.append(token)
+            elif kind == "open":
+                groups.append([[]])
+            elif kind == "close" and len(groups) > 1:
+                group = groups.pop()
+                groups[-1][-1].append(f"({self._join_implies(group)})")
+            else:
+                operand.append(token)
+
+        groups[-1][-1].append(expr[pos:])
+
+        # Unbalanced '(' — close nothing, just keep the text
+        while len(groups) > 1:
+            group = groups.pop()
+            groups[-1][-1].append(f"({self._join_implies(group)}")
+
+        return self._join_implies(groups[0]), variables
 
     def _extract_variables(self, expr: str) -> Set[str]:
-        """Extract variable names from expression"""
-        # Find all identifiers
-        identifiers = self.variable_pattern.findall(expr)
-
-        # Filter out Python keywords and operators
-        python_keywords = {
-            "and", "or", "not", "True", "False", "None",
-            "if", "else", "elif", "for", "while", "in", "is"
+        """Extract referenced variable names from Python code"""
+        # Attribute names recur across many constraints
+        return {
+            sys.intern(name) for name in _NAME_PATTERN.findall(expr)
+            if name and name not in _PYTHON_KEYWORDS
         }
 
-        variables = {
-            var for var in identifiers
-            if var not in python_keywords
-        }
+    def _join_implies(self, operands: List[List[str]]) -> str:
+        """Join the 'implies' operands of one group into Python code"""
+        texts = ["".join(pieces) for pieces in operands]
+        if len(texts) == 1:
+            return texts[0]
+
+        stripped = [text.strip() for text in texts]
+        if not all(stripped):
+            # Missing operand; leave the text as written
+            return "implies".join(texts)
 
-        return variables
+        code = stripped[-1]
+        for operand in reversed(stripped[:-1]):
+            code = f"(not ({operand})) or ({code})"
+        return code
 
     def _count_operators(self, expr: str) -> int:
         """Count operators in expression"""
-        count = 0
-        operators = ["<=", ">=", "==", "!=", "<", ">", " and ", " or ", " not "]
-
-        for op in operators:
-            count += expr.count(op)
-
-        return count
+        return sum(expr.count(op) for op in _OPERATORS)
 
     def transpile_to_assertion(self, expression: str, negate: bool = False) -> str:
         """
@@ -231,6 +287,10 @@ class ConstraintTranspiler:
         return code
 
 
+# Shared transpiler instance; ConstraintTranspiler holds no per-instance state
+DEFAULT_TRANSPILER = ConstraintTranspiler()
+
+
 class ExpressionOptimizer:
     """Optimizes transpiled Python expressions"""
 
@@ -244,13 +304,9 @@ class ExpressionOptimizer:
             x and True → x
             x or False → x
         """
-        # Remove double negation
-        expr = re.sub(r'\(not \(not ([^)]+)\)\)', r'\1', expr)
+        return _SIMPLIFY_PATTERN.sub(_simplified_match, expr)
 
-        # Simplify True/False
-        expr = re.sub(r'([a-zA-Z_]\w*) and True', r'\1', expr)
-        expr = re.sub(r'True and ([a-zA-Z_]\w*)', r'\1', expr)
-        expr = re.sub(r'([a-zA-Z_]\w*) or False', r'\1', expr)
-        expr = re.sub(r'False or ([a-zA-Z_]\w*)', r'\1', expr)
 
-        return expr
+def _simplified_match(match: "re.Match[str]") -> str:
+    """Replacement for a _SIMPLIFY_PATTERN match"""
+    return match.group(match.lastgroup)